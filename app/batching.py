@@ -0,0 +1,145 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional
+
+class MicroBatcher:
+    """
+    Coalesce concurrent requests into batches for a blocking handler.
+
+    Items submitted within `max_wait_ms` of the first item in a batch (up to
+    `max_batch_size` items) are passed to `handler` together in one call,
+    which runs in an executor so the event loop stays responsive.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor: Optional[Executor] = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            handler: Blocking function mapping a list of items to a list of results
+            max_batch_size: Largest number of items passed to one handler call
+            max_wait_ms: How long to wait for more items after the first one arrives
+            executor: Executor for handler calls (default: the loop's default executor)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self.batches_run = 0
+        self.items_run = 0
+        self._queue = None
+        self._worker = None
+        # Items taken off the queue but not yet answered (collecting or running)
+        self._batch = []
+
+    async def start(self) -> None:
+        """Start the background batching task on the running loop"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background batching task and fail any requests still waiting"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        pending = self._batch
+        self._batch = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("MicroBatcher stopped before the request was handled"))
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item: Item passed to the handler as part of a batch
+
+        Returns:
+            The handler's result for this item
+        """
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List:
+        """Wait for one item, then gather more until the batch is full or the window closes"""
+        self._batch = batch = [await self._queue.get()]
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+
+            try:
+                results = await loop.run_in_executor(self.executor, self.handler, items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"Batch handler returned {len(results)} results for {len(items)} items"
+                    )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                self._batch = []
+                continue
+
+            self.batches_run += 1
+            self.items_run += len(items)
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self._batch = []
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a latency sample.
+
+    Args:
+        values: Sample values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The percentile value, or 0.0 for an empty sample
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
@@ -1,52 +1,168 @@
 import sys
+import time
 from pathlib import Path
-from app.ingest_github_repo import ingest_github_repo
+from typing import Callable, List, Dict, Tuple
+import numpy as np
+from app import tracing
+from app.checkpoint import BuildCheckpoint, local_manifest
+from app.dedup import deduplicate_chunks
+from app.index_stats import compute_index_stats, write_index_stats
+from app.ingest_github_repo import clone_github_repo, get_head_commit
 from app.ingest_code import load_repository
 from app.vector_store import CodeVectorStore
 
 INDEX_PATH = "data/code_index"
 
-def build_index_from_github(repo_url: str, index_path: str = INDEX_PATH) -> None:
+def _resume_or_ingest(index_path: str, source: Dict, resume: bool, ingest: Callable[[], List[Dict]], dedup: bool = True) -> Tuple[List[Dict], BuildCheckpoint]:
     """
-    Complete pipeline: Clone GitHub repo → Extract code → Build index.
+    Reuse checkpointed chunks when resuming from the same source, otherwise ingest afresh.
     
     Args:
-        repo_url: GitHub repository URL
-        index_path: Where to save the index
+        index_path: Where the index (and its checkpoint) is saved
+        source: Fingerprint of the source being indexed (commit or manifest)
+        resume: Whether to continue from an existing checkpoint
+        ingest: Callable returning freshly extracted chunks
+        dedup: Collapse exact and near-duplicate chunks before embedding
+        
+    Returns:
+        Chunks to embed and the checkpoint tracking their progress
     """
-    print("=" * 60)
-    print("🚀 Building Code Index from GitHub Repository")
-    print("=" * 60)
+    checkpoint = BuildCheckpoint(index_path)
+    source = dict(source, dedup=dedup)
+    
+    if resume:
+        if checkpoint.load() is None:
+            print("⚠️  No checkpoint found, starting a fresh build")
+        elif not checkpoint.matches(source):
+            print("⚠️  Source changed since the checkpoint was taken, starting a fresh build")
+        else:
+            chunks = checkpoint.load_chunks()
+            print(f"♻️  Resuming: {checkpoint.embedded}/{len(chunks)} chunks already embedded")
+            return chunks, checkpoint
+    
+    with tracing.span("build.ingest"):
+        chunks = ingest()
+    
+    dedup_stats = None
+    if dedup and chunks:
+        with tracing.span("build.dedup"):
+            chunks, dedup_stats = deduplicate_chunks(chunks)
+        print(
+            f"🧹 Deduplicated {dedup_stats['input_chunks']} → {dedup_stats['unique_chunks']} chunks "
+            f"({dedup_stats['exact_duplicates']} exact, {dedup_stats['near_duplicates']} near duplicates)"
+        )
+    
+    if chunks:
+        checkpoint.start(chunks, source, dedup_stats=dedup_stats)
+    
+    return chunks, checkpoint
+
+def _build_and_save(chunks: List[Dict], index_path: str, checkpoint: BuildCheckpoint) -> None:
+    """Embed chunks shard by shard with checkpoints, build the FAISS index and write it to disk."""
+    print("\n🔨 STEP 2: Building vector index...")
+    with tracing.span("build.model_load"):
+        # Builds always embed locally, so the span times a real model load
+        store = CodeVectorStore(embedding_socket="")
     
-    print("\n📥 STEP 1: Cloning and ingesting repository...")
-    chunks = ingest_github_repo(repo_url)
+    shard_size = checkpoint.shard_size
     
-    if not chunks:
-        print("❌ No code chunks found. Exiting.")
-        return
+    with tracing.span("build.checkpoint_load"):
+        shards = checkpoint.load_vectors()
     
-    print(f"✅ Extracted {len(chunks)} code chunks")
+    embed_start = time.perf_counter()
+    already_embedded = checkpoint.embedded
     
-    print("\n🔨 STEP 2: Building vector index...")
-    store = CodeVectorStore()
-    store.build(chunks)
+    # Always embed in the same fixed shards so a resumed build matches an uninterrupted one
+    with tracing.span("build.encode"):
+        for start in range(checkpoint.embedded, len(chunks), shard_size):
+            vectors = store.encode_chunks(chunks[start:start + shard_size])
+            checkpoint.append_shard(vectors)
+            shards.append(vectors)
+            print(f"💾 Checkpoint: {checkpoint.embedded}/{len(chunks)} chunks embedded")
+    
+    embed_seconds = time.perf_counter() - embed_start
+    
+    store.build_from_embeddings(chunks, np.concatenate(shards))
+    
+    if checkpoint.dedup_stats:
+        _print_dedup_report(checkpoint.dedup_stats, embed_seconds, len(chunks) - already_embedded, store.index.d)
     
     print("\n💾 STEP 3: Saving index...")
     store.save(index_path)
-    
+
+def _finish_build(index_path: str, chunks: List[Dict], source: Dict, checkpoint: BuildCheckpoint, build_trace: tracing.Trace) -> None:
+    """Write the stats manifest, drop the checkpoint and print the final report."""
+    build_seconds = build_trace.total + checkpoint.previous_seconds
+    stats = compute_index_stats(chunks, source, build_seconds, checkpoint.dedup_stats)
+    write_index_stats(index_path, stats)
+    checkpoint.clear()
+    
+    _print_summary(index_path, chunks, build_trace, checkpoint.previous_seconds)
+
+def _print_dedup_report(stats: Dict, embed_seconds: float, embedded_now: int, dim: int) -> None:
+    """Compare embedding time and index size with what a build without dedup would cost."""
+    unique, total = stats["unique_chunks"], stats["input_chunks"]
+    
+    print(f"\n🧹 Duplicate rate: {stats['duplicate_rate']:.1%}")
+    if embedded_now:
+        per_chunk = embed_seconds / embedded_now
+        print(f"   Embedding time: {per_chunk * unique:.1f}s (≈{per_chunk * total:.1f}s without dedup)")
+    print(f"   Index size: {unique * dim * 4 / 1e6:.1f}MB ({total * dim * 4 / 1e6:.1f}MB without dedup)")
+
+def _print_summary(index_path: str, chunks: List[Dict], build_trace: tracing.Trace, previous_seconds: float = 0.0) -> None:
+    """Print the final build report with a per-stage timing breakdown."""
     print("\n" + "=" * 60)
     print("✅ Index built successfully!")
     print(f"📁 Location: {index_path}")
     print(f"📊 Total vectors: {len(chunks)}")
+    print("\n⏱️  Stage timings:")
+    print(build_trace.format())
+    if previous_seconds:
+        print(f"   (plus {previous_seconds:.1f}s in interrupted runs before resuming)")
+    print("=" * 60)
+
+def build_index_from_github(repo_url: str, index_path: str = INDEX_PATH, resume: bool = False, dedup: bool = True) -> None:
+    """
+    Complete pipeline: Clone GitHub repo → Extract code → Build index.
+    
+    Args:
+        repo_url: GitHub repository URL
+        index_path: Where to save the index
+        resume: Continue from the last checkpoint if the cloned commit is unchanged
+        dedup: Collapse exact and near-duplicate chunks before embedding
+    """
+    print("=" * 60)
+    print("🚀 Building Code Index from GitHub Repository")
     print("=" * 60)
+    
+    with tracing.trace() as build_trace:
+        print("\n📥 STEP 1: Cloning and ingesting repository...")
+        with tracing.span("build.clone"):
+            repo_path = clone_github_repo(repo_url)
+        source = {"repo": repo_url, "commit": get_head_commit(repo_path)}
+        chunks, checkpoint = _resume_or_ingest(
+            index_path, source, resume, lambda: load_repository(repo_path), dedup
+        )
+        
+        if not chunks:
+            print("❌ No code chunks found. Exiting.")
+            return
+        
+        print(f"✅ Extracted {len(chunks)} code chunks")
+        
+        _build_and_save(chunks, index_path, checkpoint)
+    
+    _finish_build(index_path, chunks, source, checkpoint, build_trace)
 
-def build_index_from_local(repo_path: str, index_path: str = INDEX_PATH) -> None:
+def build_index_from_local(repo_path: str, index_path: str = INDEX_PATH, resume: bool = False, dedup: bool = True) -> None:
     """
     Build index from a local repository.
     
     Args:
         repo_path: Path to local repository
         index_path: Where to save the index
+        resume: Continue from the last checkpoint if the source manifest is unchanged
+        dedup: Collapse exact and near-duplicate chunks before embedding
     """
     print("=" * 60)
     print("🚀 Building Code Index from Local Repository")
@@ -58,47 +174,49 @@ def build_index_from_local(repo_path: str, index_path: str = INDEX_PATH) -> None
         print(f"❌ Repository not found: {repo_path}")
         return
 
-    print("\n📂 STEP 1: Loading repository...")
-    chunks = load_repository(repo_path)
-    
-    if not chunks:
-        print("❌ No code chunks found. Exiting.")
-        return
-    
-    print(f"✅ Extracted {len(chunks)} code chunks")
-    
-    print("\n🔨 STEP 2: Building vector index...")
-    store = CodeVectorStore()
-    store.build(chunks)
-    
-    print("\n💾 STEP 3: Saving index...")
-    store.save(index_path)
-    
-    print("\n" + "=" * 60)
-    print("✅ Index built successfully!")
-    print(f"📁 Location: {index_path}")
-    print(f"📊 Total vectors: {len(chunks)}")
-    print("=" * 60)
+    with tracing.trace() as build_trace:
+        print("\n📂 STEP 1: Loading repository...")
+        with tracing.span("build.manifest"):
+            source = {"path": str(repo_path.resolve()), "manifest": local_manifest(repo_path)}
+        chunks, checkpoint = _resume_or_ingest(
+            index_path, source, resume, lambda: load_repository(repo_path), dedup
+        )
+        
+        if not chunks:
+            print("❌ No code chunks found. Exiting.")
+            return
+        
+        print(f"✅ Extracted {len(chunks)} code chunks")
+        
+        _build_and_save(chunks, index_path, checkpoint)
+    
+    _finish_build(index_path, chunks, source, checkpoint, build_trace)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    flags = {"--resume", "--no-dedup"}
+    args = [arg for arg in sys.argv[1:] if arg not in flags]
+    resume = "--resume" in sys.argv[1:]
+    dedup = "--no-dedup" not in sys.argv[1:]
+    
+    if len(args) < 1:
         print("Usage:")
-        print("  From GitHub:  python -m app.build_index --github <repo_url>")
-        print("  From local:   python -m app.build_index --local <path>")
+        print("  From GitHub:  python -m app.build_index --github <repo_url> [--resume] [--no-dedup]")
+        print("  From local:   python -m app.build_index --local <path> [--resume] [--no-dedup]")
         print("\nExamples:")
         print("  python -m app.build_index --github https://github.com/pallets/flask")
         print("  python -m app.build_index --local ./my-project")
+        print("  python -m app.build_index --local ./my-project --resume")
         sys.exit(1)
     
-    mode = sys.argv[1]
+    mode = args[0]
     
-    if mode == "--github" and len(sys.argv) >= 3:
-        repo_url = sys.argv[2]
-        build_index_from_github(repo_url)
+    if mode == "--github" and len(args) >= 2:
+        repo_url = args[1]
+        build_index_from_github(repo_url, resume=resume, dedup=dedup)
     
-    elif mode == "--local" and len(sys.argv) >= 3:
-        repo_path = sys.argv[2]
-        build_index_from_local(repo_path)
+    elif mode == "--local" and len(args) >= 2:
+        repo_path = args[1]
+        build_index_from_local(repo_path, resume=resume, dedup=dedup)
     
     else:
         print("❌ Invalid arguments. Use --github <url> or --local <path>")
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import json
+import shutil
+import time
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Optional
+from app.fileio import atomic_write
+from app.ingest_code import should_skip_file
+
+CHECKPOINT_DIR = ".checkpoint"
+CHECKPOINT_EVERY = 2048
+
+def local_manifest(repo_path: Path) -> str:
+    """
+    Fingerprint the Python sources of a local repository.
+
+    Covers exactly the files load_repository ingests, so ignored directories
+    such as virtualenvs and node_modules are never read.
+
+    Args:
+        repo_path: Path to repository root
+
+    Returns:
+        SHA-256 over every ingested .py file's relative path and contents
+    """
+    repo_path = Path(repo_path)
+    digest = hashlib.sha256()
+
+    for py_file in sorted(repo_path.rglob("*.py")):
+        # Quiet: load_repository reports skipped files during ingestion
+        if should_skip_file(py_file, verbose=False):
+            continue
+        try:
+            content = py_file.read_bytes()
+        except OSError:
+            continue
+        digest.update(py_file.relative_to(repo_path).as_posix().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(hashlib.sha256(content).digest())
+
+    return digest.hexdigest()
+
+class BuildCheckpoint:
+    """
+    On-disk progress of an index build, stored under <index_path>/.checkpoint.
+
+    Holds the extracted chunks, a fingerprint of the source they came from and
+    the embedded vectors so far as fixed-size shards. Every file is written
+    atomically and state.json is updated only after its shard is on disk, so a
+    build killed at any point resumes from the last completed shard.
+    """
+
+    def __init__(self, index_path: str):
+        """
+        Args:
+            index_path: Directory the final index will be saved to
+        """
+        self.dir = Path(index_path) / CHECKPOINT_DIR
+        self.state = None
+        self._started = time.monotonic()
+        self._previous_seconds = 0.0
+
+    @property
+    def state_path(self) -> Path:
+        return self.dir / "state.json"
+
+    @property
+    def embedded(self) -> int:
+        """Number of chunks with vectors on disk"""
+        return self.state["embedded"] if self.state else 0
+
+    @property
+    def shard_size(self) -> int:
+        return self.state["shard_size"] if self.state else CHECKPOINT_EVERY
+
+    @property
+    def previous_seconds(self) -> float:
+        """Build time spent by interrupted runs whose progress this build reuses"""
+        return self._previous_seconds
+
+    @property
+    def dedup_stats(self) -> Optional[Dict]:
+        return self.state.get("dedup") if self.state else None
+
+    def load(self) -> Optional[Dict]:
+        """
+        Load checkpoint state if a checkpoint exists.
+
+        Returns:
+            The state dictionary, or None if there is no usable checkpoint
+        """
+        if not self.state_path.exists():
+            return None
+
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable checkpoint: {e}")
+            self.state = None
+
+        if self.state is not None:
+            self._previous_seconds = self.state.get("elapsed_seconds", 0.0)
+
+        return self.state
+
+    def matches(self, source: Dict) -> bool:
+        """Whether the checkpoint was taken from the same source commit or manifest"""
+        return self.state is not None and self.state.get("source") == source
+
+    def start(self, chunks: List[Dict], source: Dict, shard_size: Optional[int] = None, dedup_stats: Optional[Dict] = None) -> None:
+        """
+        Discard any previous checkpoint and record the chunks for a new build.
+
+        Args:
+            chunks: Extracted code chunks, in embedding order
+            source: Source fingerprint (commit or manifest)
+            shard_size: Chunks embedded between checkpoints (default: CHECKPOINT_EVERY)
+            dedup_stats: Deduplication report to keep alongside the chunks
+        """
+        self.clear()
+        self._previous_seconds = 0.0
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        atomic_write(self.dir / "chunks.json", json.dumps(chunks).encode("utf-8"))
+
+        self.state = {
+            "source": source,
+            "num_chunks": len(chunks),
+            "shard_size": shard_size or CHECKPOINT_EVERY,
+            "embedded": 0,
+            "shards": [],
+            "dedup": dedup_stats,
+        }
+        self._write_state()
+
+    def load_chunks(self) -> List[Dict]:
+        with open(self.dir / "chunks.json", "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+
+        if len(chunks) != self.state["num_chunks"]:
+            raise ValueError("Checkpoint chunks do not match checkpoint state")
+        return chunks
+
+    def append_shard(self, vectors: np.ndarray) -> None:
+        """
+        Persist the vectors for the next shard of chunks.
+
+        Args:
+            vectors: float32 embeddings for chunks[embedded:embedded + len(vectors)]
+        """
+        name = f"vectors_{len(self.state['shards']):05d}.npy"
+
+        buffer = io.BytesIO()
+        np.save(buffer, vectors)
+        atomic_write(self.dir / name, buffer.getvalue())
+
+        self.state["shards"].append(name)
+        self.state["embedded"] += len(vectors)
+        self._write_state()
+
+    def load_vectors(self) -> List[np.ndarray]:
+        """Load every completed shard, in order"""
+        return [np.load(self.dir / name) for name in self.state["shards"]]
+
+    def clear(self) -> None:
+        """Remove the checkpoint directory"""
+        if self.dir.exists():
+            shutil.rmtree(self.dir)
+        self.state = None
+
+    def _write_state(self) -> None:
+        # Total build time so far, so a resumed build can report the whole duration
+        self.state["elapsed_seconds"] = self._previous_seconds + time.monotonic() - self._started
+        atomic_write(self.state_path, json.dumps(self.state, indent=2).encode("utf-8"))
@@ -0,0 +1,165 @@
+import hashlib
+import re
+import zlib
+import numpy as np
+from typing import List, Dict, Tuple
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+LSH_BANDS = 16
+NEAR_DUP_THRESHOLD = 0.85
+MIN_NEAR_DUP_TOKENS = 30
+# Candidates whose MinHash estimate falls this far below the threshold skip
+# the exact Jaccard check (~3 standard errors at 64 permutations)
+SIGNATURE_SLACK = 0.15
+
+# Strings are matched first so '#' inside them is not taken for a comment
+_TOKEN_RE = re.compile(r'''
+    (?P<string>[rRbBuUfF]{0,2}(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'))
+  | (?P<comment>\#[^\n]*)
+  | (?P<word>\w+)
+  | (?P<op>[^\w\s])
+''', re.VERBOSE)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+def tokenize_source(code: str) -> List[str]:
+    """
+    Split source into tokens with comments and whitespace dropped.
+
+    Works on any snippet (including methods cut out of a class body), so
+    it does not rely on the code being valid Python on its own.
+
+    Args:
+        code: Source code
+
+    Returns:
+        List of token strings
+    """
+    return [
+        m.group() for m in _TOKEN_RE.finditer(code)
+        if m.lastgroup != "comment"
+    ]
+
+def _shingles(tokens: List[str]) -> set:
+    if len(tokens) <= SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(tokens).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(tokens[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+
+def _minhash(shingles: set) -> np.ndarray:
+    values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    hashed = (np.outer(_PERM_A, values) + _PERM_B[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+    return hashed.min(axis=1)
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b)
+
+def _contains(a: str, b: str) -> bool:
+    """Whether one normalised source is nested in the other (e.g. a class and its method)"""
+    return a in b or b in a
+
+def _alias(chunk: Dict) -> Dict:
+    return {"file": chunk["file"], "name": chunk["name"], "type": chunk["type"]}
+
+def deduplicate_chunks(chunks: List[Dict], near_threshold: float = NEAR_DUP_THRESHOLD) -> Tuple[List[Dict], Dict]:
+    """
+    Collapse exact and near-duplicate code chunks before embedding.
+
+    Exact duplicates share the same type and normalised source. Near
+    duplicates are found with MinHash + LSH over token shingles and confirmed
+    by exact Jaccard similarity against a cluster's representative of the same
+    type. A chunk is never merged with one that contains it or is contained in
+    it in the same file (a class and its only method). The first chunk
+    of each cluster (in ingestion order) is kept; the locations of the
+    others are recorded in its "aliases" list.
+
+    Args:
+        chunks: Code chunks from ingestion
+        near_threshold: Minimum shingle Jaccard similarity for a near duplicate
+
+    Returns:
+        Tuple of (representative chunks, stats dictionary)
+    """
+    rows_per_band = NUM_PERM // LSH_BANDS
+
+    exact_reps = {}
+    buckets = [dict() for _ in range(LSH_BANDS)]
+    rep_shingles = []
+    rep_signatures = []
+    rep_normalized = []
+    unique = []
+    exact_dups = 0
+    near_dups = 0
+
+    for chunk in chunks:
+        tokens = tokenize_source(chunk["code"])
+        # Normalised source: tokens joined by single spaces, comments dropped
+        normalized = " ".join(tokens)
+        key = hashlib.sha1(f"{chunk['type']}\0{normalized}".encode("utf-8")).digest()
+
+        if key in exact_reps:
+            unique[exact_reps[key]].setdefault("aliases", []).append(_alias(chunk))
+            exact_dups += 1
+            continue
+
+        shingles = None
+        signature = None
+
+        if len(tokens) >= MIN_NEAR_DUP_TOKENS:
+            shingles = _shingles(tokens)
+            signature = _minhash(shingles)
+
+            candidates = set()
+            for band, table in enumerate(buckets):
+                band_key = signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes()
+                candidates.update(table.get(band_key, ()))
+
+            match = None
+            for rep in sorted(candidates):
+                rep_chunk = unique[rep]
+                if rep_chunk["type"] != chunk["type"]:
+                    continue
+                if rep_chunk["file"] == chunk["file"] and _contains(rep_normalized[rep], normalized):
+                    continue
+                estimate = np.count_nonzero(signature == rep_signatures[rep]) / NUM_PERM
+                if estimate < near_threshold - SIGNATURE_SLACK:
+                    continue
+                if _jaccard(shingles, rep_shingles[rep]) >= near_threshold:
+                    match = rep
+                    break
+
+            if match is not None:
+                unique[match].setdefault("aliases", []).append(_alias(chunk))
+                exact_reps[key] = match
+                near_dups += 1
+                continue
+
+        rep = len(unique)
+        chunk = dict(chunk)
+        unique.append(chunk)
+        rep_shingles.append(shingles)
+        rep_signatures.append(signature)
+        rep_normalized.append(normalized)
+        exact_reps[key] = rep
+
+        if signature is not None:
+            for band, table in enumerate(buckets):
+                band_key = signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes()
+                table.setdefault(band_key, []).append(rep)
+
+    stats = {
+        "input_chunks": len(chunks),
+        "unique_chunks": len(unique),
+        "exact_duplicates": exact_dups,
+        "near_duplicates": near_dups,
+        "duplicate_rate": (exact_dups + near_dups) / len(chunks) if chunks else 0.0,
+    }
+    return unique, stats
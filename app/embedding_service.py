@@ -0,0 +1,439 @@
+"""
+Shared local embedding service.
+
+One process owns the sentence-transformers model and serves encode requests
+from any number of client processes over a Unix socket, coalescing
+concurrent requests into batched encode calls. CodeVectorStore connects to
+it automatically when the socket exists, and otherwise loads its own model.
+
+Run:
+    python -m app.embedding_service serve
+    python -m app.embedding_service bench --clients 8 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import struct
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from app.batching import MicroBatcher, percentile
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_SOCKET_PATH = os.environ.get("CODEBASE_RAG_EMBED_SOCKET", "data/embed.sock")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+_LENGTH = struct.Struct("!I")
+
+class EmbeddingServiceError(RuntimeError):
+    """Raised when the embedding service rejects or fails a request"""
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB (0.0 where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0.0
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (Linux reports KB)"""
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _socket_in_use(socket_path: Path) -> bool:
+    """True if something is accepting connections on `socket_path`"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+def _frame(data: bytes) -> bytes:
+    return _LENGTH.pack(len(data)) + data
+
+async def _read_frame_async(reader: asyncio.StreamReader) -> Optional[bytes]:
+    try:
+        header = await reader.readexactly(_LENGTH.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise EmbeddingServiceError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    return await reader.readexactly(length)
+
+def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+    chunks = []
+    while n:
+        chunk = sock.recv(n)
+        if not chunk:
+            raise ConnectionError("Embedding service closed the connection")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+def _read_frame(sock: socket.socket) -> bytes:
+    (length,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    if length > MAX_FRAME_BYTES:
+        raise EmbeddingServiceError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    return _recv_exactly(sock, length)
+
+class EmbeddingService:
+    """
+    Unix-socket server owning a single embedding model.
+
+    Each request is a JSON frame {"op": "encode", "model": str, "texts": [...]}
+    (or {"op": "ping"}). An encode reply is a JSON header frame
+    {"ok": true, "shape": [n, dim]} followed by a frame of float32 vectors.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0
+    ):
+        """
+        Args:
+            model_name: HuggingFace model name for embeddings
+            socket_path: Filesystem path of the Unix socket
+            max_batch_size: Most requests coalesced into one encode call
+            max_wait_ms: Batching window after the first queued request
+        """
+        from sentence_transformers import SentenceTransformer
+
+        print(f"Loading embedding model: {model_name}")
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.socket_path = Path(socket_path)
+        self.requests_served = 0
+        self.batcher = MicroBatcher(
+            self._encode_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+        )
+
+    def _encode_batch(self, items: List[List[str]]) -> List[np.ndarray]:
+        """Encode every request's texts in one call and split the result back up"""
+        texts = [text for item in items for text in item]
+        vectors = np.array(self.model.encode(texts, batch_size=64)).astype("float32")
+
+        results, offset = [], 0
+        for item in items:
+            results.append(vectors[offset:offset + len(item)])
+            offset += len(item)
+        return results
+
+    async def _handle_request(self, request: Dict) -> Tuple[Dict, Optional[bytes]]:
+        op = request.get("op", "encode")
+
+        if op == "ping":
+            return {
+                "ok": True,
+                "model": self.model_name,
+                "pid": os.getpid(),
+                "rss_mb": _rss_mb(),
+                "peak_rss_mb": _peak_rss_mb(),
+                "requests_served": self.requests_served,
+                "batches_run": self.batcher.batches_run,
+            }, None
+
+        if op != "encode":
+            return {"ok": False, "error": f"Unknown op: {op}"}, None
+
+        if request.get("model") != self.model_name:
+            return {"ok": False, "error": f"Service runs {self.model_name}, not {request.get('model')}"}, None
+
+        texts = request.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            return {"ok": False, "error": "'texts' must be a list of strings"}, None
+
+        vectors = await self.batcher.submit(texts) if texts else np.zeros((0, 0), dtype="float32")
+        self.requests_served += 1
+        return {"ok": True, "shape": list(vectors.shape)}, np.ascontiguousarray(vectors).tobytes()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                data = await _read_frame_async(reader)
+                if data is None:
+                    break
+
+                try:
+                    header, body = await self._handle_request(json.loads(data))
+                except Exception as e:
+                    header, body = {"ok": False, "error": str(e)}, None
+
+                writer.write(_frame(json.dumps(header).encode("utf-8")))
+                if body is not None:
+                    writer.write(_frame(body))
+                await writer.drain()
+        except (ConnectionError, EmbeddingServiceError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        """Listen on the Unix socket until cancelled"""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            if _socket_in_use(self.socket_path):
+                raise EmbeddingServiceError(f"An embedding service is already listening on {self.socket_path}")
+            # Left behind by a service that did not shut down cleanly
+            self.socket_path.unlink()
+
+        await self.batcher.start()
+        server = await asyncio.start_unix_server(self._handle_connection, str(self.socket_path))
+
+        print(f"🧠 Embedding service listening on {self.socket_path} (pid {os.getpid()}, {_rss_mb():.0f}MB RSS)")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+
+class EmbeddingClient:
+    """Blocking client for EmbeddingService; each thread gets its own connection so concurrent requests can be batched"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, model_name: str = DEFAULT_MODEL, timeout: float = 10.0):
+        """
+        Args:
+            socket_path: Filesystem path of the service's Unix socket
+            model_name: Model the caller expects the service to run
+            timeout: Socket timeout in seconds
+        """
+        self.socket_path = str(socket_path)
+        self.model_name = model_name
+        self.timeout = timeout
+        # One socket per thread, keyed by thread so exited threads' sockets can be closed
+        self._socks = {}
+        self._socks_lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        thread = threading.current_thread()
+        with self._socks_lock:
+            sock = self._socks.get(thread)
+
+        if sock is None:
+            self._close_dead_threads()
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            with self._socks_lock:
+                self._socks[thread] = sock
+
+        sock.settimeout(self.timeout)
+        return sock
+
+    def _close_dead_threads(self) -> None:
+        """Close connections owned by threads that have exited"""
+        with self._socks_lock:
+            dead = [thread for thread in self._socks if not thread.is_alive()]
+            socks = [self._socks.pop(thread) for thread in dead]
+        for sock in socks:
+            sock.close()
+
+    def _request(self, payload: Dict) -> Tuple[Dict, Optional[bytes]]:
+        data = _frame(json.dumps(payload).encode("utf-8"))
+
+        # One reconnect covers a service restart between requests
+        for attempt in range(2):
+            try:
+                sock = self._connect()
+                sock.sendall(data)
+                header = json.loads(_read_frame(sock))
+                body = _read_frame(sock) if header.get("ok") and "shape" in header else None
+                break
+            except (OSError, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+        if not header.get("ok"):
+            raise EmbeddingServiceError(header.get("error", "Unknown embedding service error"))
+        return header, body
+
+    def ping(self) -> Dict:
+        """Service status: model, pid, RSS and request counters"""
+        header, _ = self._request({"op": "ping"})
+        return header
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts on the shared model.
+
+        Args:
+            texts: Strings to embed
+
+        Returns:
+            float32 array of shape (len(texts), dim)
+        """
+        header, body = self._request({"op": "encode", "model": self.model_name, "texts": list(texts)})
+        # Copy so callers get a writable array, as with a local encode
+        return np.frombuffer(body, dtype="float32").reshape(header["shape"]).copy()
+
+    def close(self) -> None:
+        """Close this thread's connection"""
+        with self._socks_lock:
+            sock = self._socks.pop(threading.current_thread(), None)
+        if sock is not None:
+            sock.close()
+
+    def close_all(self) -> None:
+        """Close every thread's connection; threads still holding the client reconnect on their next request"""
+        with self._socks_lock:
+            socks, self._socks = list(self._socks.values()), {}
+        for sock in socks:
+            sock.close()
+
+def connect_embedding_service(model_name: str = DEFAULT_MODEL, socket_path: Optional[str] = None) -> Optional[EmbeddingClient]:
+    """
+    Connect to a running embedding service for `model_name`, if there is one.
+
+    Args:
+        model_name: Model the caller needs
+        socket_path: Socket path; None uses CODEBASE_RAG_EMBED_SOCKET or data/embed.sock,
+            "" or False disables the service
+
+    Returns:
+        A connected client, or None if no compatible service is reachable
+    """
+    if socket_path is None:
+        socket_path = DEFAULT_SOCKET_PATH
+
+    if not socket_path or not hasattr(socket, "AF_UNIX") or not Path(socket_path).exists():
+        return None
+
+    client = EmbeddingClient(socket_path, model_name, timeout=2.0)
+    try:
+        status = client.ping()
+    except (OSError, ConnectionError, EmbeddingServiceError, ValueError):
+        client.close()
+        return None
+
+    if status.get("model") != model_name:
+        client.close()
+        return None
+
+    client.timeout = 10.0
+    return client
+
+def _bench_worker(mode: str, socket_path: str, model_name: str, queries: List[str]) -> Dict:
+    """Run in a separate process: start up, encode queries one at a time, report timings and RSS"""
+    start = time.perf_counter()
+    if mode == "service":
+        client = EmbeddingClient(socket_path, model_name)
+        encode = client.encode
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name)
+        encode = model.encode
+    startup = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        encode([query])
+        latencies.append(time.perf_counter() - t0)
+
+    return {"startup_s": startup, "latencies": latencies, "rss_mb": _rss_mb(), "peak_rss_mb": _peak_rss_mb()}
+
+def benchmark(socket_path: str, model_name: str, clients: int, requests: int) -> Dict:
+    """
+    Compare N processes sharing the service with N processes each loading the model.
+
+    Requires the service to be running on `socket_path`.
+    """
+    import multiprocessing
+
+    queries = [f"How does function_{i} handle errors?" for i in range(requests)]
+    service = EmbeddingClient(socket_path, model_name).ping()
+    ctx = multiprocessing.get_context("spawn")
+
+    report = {}
+    for mode in ("service", "local"):
+        print(f"⏱️  Running {clients} {mode} clients...")
+        start = time.perf_counter()
+        with ctx.Pool(clients) as pool:
+            runs = pool.starmap(_bench_worker, [(mode, socket_path, model_name, queries)] * clients)
+        elapsed = time.perf_counter() - start
+
+        latencies = [l for run in runs for l in run["latencies"]]
+        client_rss = sum(run["rss_mb"] for run in runs)
+        client_peak_rss = sum(run["peak_rss_mb"] for run in runs)
+        report[mode] = {
+            "clients": clients,
+            "requests_per_client": requests,
+            "wall_s": elapsed,
+            "startup_s_mean": statistics.mean(run["startup_s"] for run in runs),
+            "encode_p50_ms": percentile(latencies, 50) * 1000,
+            "encode_p99_ms": percentile(latencies, 99) * 1000,
+            "client_rss_mb_total": client_rss,
+            "host_rss_mb": client_rss + (service["rss_mb"] if mode == "service" else 0.0),
+            # Includes each local client's transient model-load peak
+            "client_peak_rss_mb_total": client_peak_rss,
+        }
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared embedding service")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Run the service")
+    serve.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    serve.add_argument("--model", default=DEFAULT_MODEL)
+    serve.add_argument("--max-batch", type=int, default=64)
+    serve.add_argument("--max-wait-ms", type=float, default=2.0)
+
+    bench = sub.add_parser("bench", help="Measure memory and encode latency against a running service")
+    bench.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    bench.add_argument("--model", default=DEFAULT_MODEL)
+    bench.add_argument("--clients", type=int, default=4)
+    bench.add_argument("--requests", type=int, default=100, help="Queries encoded per client")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if _socket_in_use(Path(args.socket)):
+            print(f"❌ An embedding service is already listening on {args.socket}")
+            raise SystemExit(1)
+
+        service = EmbeddingService(args.model, args.socket, args.max_batch, args.max_wait_ms)
+        try:
+            asyncio.run(service.serve())
+        except KeyboardInterrupt:
+            print("\n👋 Embedding service stopped")
+        except EmbeddingServiceError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+    else:
+        report = benchmark(args.socket, args.model, args.clients, args.requests)
+
+        print("\n📊 Query encoding across processes")
+        for mode, stats in report.items():
+            print(
+                f"  {mode:<8} p50 {stats['encode_p50_ms']:7.2f}ms   p99 {stats['encode_p99_ms']:7.2f}ms   "
+                f"startup {stats['startup_s_mean']:6.2f}s   host RSS {stats['host_rss_mb']:8.0f}MB"
+            )
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,18 @@
+import os
+from pathlib import Path
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """
+    Write a file so readers see either the old contents or the new, never a partial write.
+
+    Args:
+        path: Destination file
+        data: Complete new contents
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
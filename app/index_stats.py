@@ -0,0 +1,73 @@
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Optional
+from app.fileio import atomic_write
+
+STATS_FILE = "stats.json"
+
+def compute_index_stats(
+    chunks: List[Dict],
+    source: Dict,
+    build_seconds: float,
+    dedup_stats: Optional[Dict] = None
+) -> Dict:
+    """
+    Summarise an index build into a small manifest.
+
+    Args:
+        chunks: Chunks stored in the index
+        source: Source fingerprint ("repo" and "commit", or "path" and "manifest")
+        build_seconds: Wall-clock duration of the build
+        dedup_stats: Deduplication report, if dedup ran
+
+    Returns:
+        JSON-serialisable stats dictionary
+    """
+    # Files whose chunks were all collapsed into another file's aliases still count
+    files = {c["file"] for c in chunks}
+    files.update(alias["file"] for c in chunks for alias in c.get("aliases", []))
+
+    return {
+        "chunks": len(chunks),
+        "types": dict(Counter(c["type"] for c in chunks)),
+        "files": len(files),
+        "repo": source.get("repo") or source.get("path"),
+        "commit": source.get("commit"),
+        "manifest": source.get("manifest"),
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "build_seconds": round(build_seconds, 2),
+        "dedup": dedup_stats,
+    }
+
+def write_index_stats(index_path: str, stats: Dict) -> None:
+    """
+    Write the stats manifest next to the index files, atomically so readers never see a partial file.
+
+    Args:
+        index_path: Index directory
+        stats: Output of compute_index_stats
+    """
+    path = Path(index_path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    atomic_write(path / STATS_FILE, json.dumps(stats, indent=2).encode("utf-8"))
+
+def load_index_stats(index_path: str) -> Optional[Dict]:
+    """
+    Read the stats manifest without touching the (much larger) metadata file.
+
+    Args:
+        index_path: Index directory
+
+    Returns:
+        Stats dictionary, or None if the index was built without one
+    """
+    stats_path = Path(index_path) / STATS_FILE
+
+    if not stats_path.exists():
+        return None
+
+    with open(stats_path, "r", encoding="utf-8") as f:
+        return json.load(f)
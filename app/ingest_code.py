@@ -19,12 +19,13 @@ IGNORE_EXTENSIONS = {
 MAX_FILE_SIZE_KB = 500
 MAX_CHARS_PER_FILE = 100000
 
-def should_skip_file(file_path: Path) -> bool:
+def should_skip_file(file_path: Path, verbose: bool = True) -> bool:
     """
     Determine if a file should be skipped during ingestion.
     
     Args:
         file_path: Path to the file
+        verbose: Report skipped large files
         
     Returns:
         True if file should be skipped, False otherwise
@@ -44,7 +45,8 @@ def should_skip_file(file_path: Path) -> bool:
     try:
         size_kb = file_path.stat().st_size / 1024
         if size_kb > MAX_FILE_SIZE_KB:
-            print(f"⏭ Skipping large file ({size_kb:.1f}KB): {file_path}")
+            if verbose:
+                print(f"⏭ Skipping large file ({size_kb:.1f}KB): {file_path}")
             return True
     except Exception:
         return True
@@ -57,6 +57,18 @@ def clone_github_repo(repo_url: str) -> Path:
     
     return repo_path
 
+def get_head_commit(repo_path: Path) -> str:
+    """
+    Get the commit SHA checked out in a cloned repository.
+    
+    Args:
+        repo_path: Path to a git working tree
+        
+    Returns:
+        Hex SHA of HEAD
+    """
+    return Repo(repo_path).head.commit.hexsha
+
 def ingest_github_repo(repo_url: str) -> List[Dict]:
     """
     Clone a GitHub repo and extract all Python code chunks.
@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+from app import tracing
+from app.batching import MicroBatcher, percentile
+from app.rag_answer import RAGAnswerer, INDEX_PATH
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1_000_000
+MAX_K = 50
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+class QueryServer:
+    """
+    Asyncio HTTP server exposing retrieval and answering over a loaded index.
+
+    Endpoints:
+        GET  /health   -> index status
+        GET  /metrics  -> per-stage latency histograms (Prometheus text format)
+        GET  /metrics.json -> the same histograms as JSON
+        POST /search   {"query": str, "k": int}    -> {"results": [...]}
+        POST /answer   {"question": str, "k": int} -> {"answer": str, "results": [...]}
+
+    Concurrent retrievals (from both endpoints) are coalesced by a MicroBatcher
+    into a single batched encode + FAISS search.
+    """
+
+    def __init__(
+        self,
+        rag: RAGAnswerer,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        answer_workers: int = 4
+    ):
+        """
+        Initialize the server around an already loaded RAGAnswerer.
+
+        Args:
+            rag: Loaded RAG answerer (its store is used for retrieval)
+            max_batch_size: Most queries coalesced into one search call
+            max_wait_ms: Batching window after the first queued query
+            answer_workers: Threads available for blocking Ollama calls
+        """
+        self.rag = rag
+        # A single search thread: batches run back to back while the next one fills up
+        self.batcher = MicroBatcher(
+            self._search_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            executor=ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        )
+        self.answer_executor = ThreadPoolExecutor(
+            max_workers=answer_workers, thread_name_prefix="answer"
+        )
+        self._server = None
+
+    def _search_batch(self, items: List[Tuple[str, int]]) -> List[List[Dict]]:
+        """Run one batched search, using the largest k and trimming per request"""
+        queries = [query for query, _ in items]
+        max_k = max(k for _, k in items)
+        batch_results = self.rag.store.search_batch(queries, k=max_k)
+        return [results[:k] for (_, k), results in zip(items, batch_results)]
+
+    async def search(self, query: str, k: int = 5) -> List[Dict]:
+        """Retrieve top-k chunks for a query through the batcher"""
+        return await self.batcher.submit((query, k))
+
+    async def answer(self, question: str, k: int = 5) -> Tuple[str, List[Dict]]:
+        """Retrieve through the batcher, then generate the answer off the event loop"""
+        results = await self.search(question, k)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.answer_executor, self.rag.answer_from_results, question, results
+        )
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Union[Dict, str]]:
+        if path in ("/metrics", "/metrics.json"):
+            if method != "GET":
+                return 405, {"error": f"{method} not allowed on {path}"}
+            if path == "/metrics":
+                return 200, tracing.export_prometheus()
+            return 200, {"enabled": tracing.TRACER.enabled, "stages": tracing.export_json()}
+
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": f"{method} not allowed on {path}"}
+            return 200, {
+                "status": "ok",
+                "vectors": self.rag.store.index.ntotal,
+                "ollama_available": self.rag.ollama_available,
+                "batches_run": self.batcher.batches_run,
+                "queries_run": self.batcher.items_run,
+            }
+
+        if path not in ("/search", "/answer"):
+            return 404, {"error": f"Unknown path: {path}"}
+
+        if method != "POST":
+            return 405, {"error": f"{method} not allowed on {path}"}
+
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError as e:
+            return 400, {"error": f"Invalid JSON: {e}"}
+
+        if not isinstance(payload, dict):
+            return 400, {"error": "Request body must be a JSON object"}
+
+        field = "query" if path == "/search" else "question"
+        text = payload.get(field)
+        k = payload.get("k", 5)
+
+        if not isinstance(text, str) or not text.strip():
+            return 400, {"error": f"'{field}' must be a non-empty string"}
+        if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= MAX_K:
+            return 400, {"error": f"'k' must be an integer between 1 and {MAX_K}"}
+
+        if path == "/search":
+            with tracing.span("server.search"):
+                results = await self.search(text, k)
+            return 200, {"results": results}
+
+        with tracing.span("server.answer"):
+            answer, results = await self.answer(text, k)
+        return 200, {"answer": answer, "results": results}
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, bytes]]:
+        """Parse one HTTP/1.1 request; returns None when the client closed the connection"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise ValueError("Malformed request line")
+        method, target, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            raise OverflowError(f"Body of {length} bytes exceeds {MAX_BODY_BYTES}")
+        body = await reader.readexactly(length) if length else b""
+
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Union[Dict, str], keep_alive: bool) -> None:
+        if isinstance(payload, str):
+            data = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            data = json.dumps(payload).encode("utf-8")
+            content_type = "application/json"
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except OverflowError as e:
+                    await self._write_response(writer, 413, {"error": str(e)}, keep_alive=False)
+                    break
+                except (ValueError, asyncio.IncompleteReadError) as e:
+                    await self._write_response(writer, 400, {"error": str(e)}, keep_alive=False)
+                    break
+
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+                await self._write_response(writer, status, payload, keep_alive)
+
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        """Shut down the search and answer thread pools"""
+        self.batcher.executor.shutdown(wait=True)
+        self.answer_executor.shutdown(wait=True)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """Start the batcher and serve HTTP until cancelled"""
+        await self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+        print(f"🌐 Query server listening on http://{host}:{port}")
+        print(f"   Batching: up to {self.batcher.max_batch_size} queries / {self.batcher.max_wait * 1000:.1f}ms window")
+
+        async with self._server:
+            await self._server.serve_forever()
+
+async def _run_load(server: QueryServer, queries: List[str], concurrency: int, k: int) -> Dict:
+    """Fire `queries` at the server's retrieval path with a fixed number of concurrent clients"""
+    latencies = []
+    pending = list(queries)
+
+    async def client():
+        while pending:
+            query = pending.pop()
+            start = time.perf_counter()
+            await server.search(query, k)
+            latencies.append(time.perf_counter() - start)
+
+    await server.batcher.start()
+    batches_before = server.batcher.batches_run
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    await server.batcher.stop()
+
+    batches = server.batcher.batches_run - batches_before
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "qps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_batch_size": len(latencies) / batches if batches else 0.0,
+    }
+
+def benchmark(rag: RAGAnswerer, requests: int, concurrency: int, k: int, max_batch_size: int, max_wait_ms: float) -> Dict:
+    """
+    Compare one-at-a-time retrieval with micro-batched retrieval under concurrent load.
+
+    Queries are built from names in the loaded index so both runs do identical work.
+    """
+    names = [m["name"] for m in rag.store.metadata] or ["main"]
+    rng = random.Random(0)
+    queries = [f"How does {rng.choice(names)} work?" for _ in range(requests)]
+
+    report = {}
+    for label, batch_size in (("sequential", 1), ("batched", max_batch_size)):
+        server = QueryServer(rag, max_batch_size=batch_size, max_wait_ms=max_wait_ms)
+        try:
+            report[label] = asyncio.run(_run_load(server, queries, concurrency, k))
+        finally:
+            server.close()
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve retrieval and answers over HTTP")
+    parser.add_argument("--index", default=INDEX_PATH, help="Index directory")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=32, help="Most queries per batched search")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Batching window in milliseconds")
+    parser.add_argument("--trace", action="store_true", help="Record per-stage latency histograms for /metrics")
+    parser.add_argument("--bench", action="store_true", help="Measure QPS/p99 sequential vs batched, then exit")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per benchmark run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients in benchmark")
+    parser.add_argument("-k", type=int, default=5, help="Results per query in benchmark")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.enable()
+
+    rag = RAGAnswerer(args.index)
+
+    if args.bench:
+        report = benchmark(rag, args.requests, args.concurrency, args.k, args.max_batch, args.max_wait_ms)
+
+        print("\n📊 Retrieval under concurrent load")
+        for label, stats in report.items():
+            print(
+                f"  {label:<10} {stats['qps']:8.1f} QPS   "
+                f"p50 {stats['p50_ms']:7.2f}ms   p99 {stats['p99_ms']:7.2f}ms   "
+                f"avg batch {stats['mean_batch_size']:.1f}"
+            )
+        print(json.dumps(report, indent=2))
+    else:
+        server = QueryServer(rag, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+        try:
+            asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            print("\n👋 Query server stopped")
+        finally:
+            server.close()
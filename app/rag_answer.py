@@ -1,16 +1,19 @@
 import requests
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
+from app import tracing
 from app.vector_store import CodeVectorStore
 
 INDEX_PATH = "data/code_index"
+OLLAMA_URL = "http://localhost:11434"
 
 class RAGAnswerer:
     """
     Simplified RAG answerer with better error handling
     """
     
-    def __init__(self, index_path: str = INDEX_PATH):
-        self.store = CodeVectorStore()
+    def __init__(self, index_path: str = INDEX_PATH, ollama_url: str = OLLAMA_URL, embedding_socket: Optional[str] = None):
+        self.ollama_url = ollama_url.rstrip("/")
+        self.store = CodeVectorStore(embedding_socket=embedding_socket)
         
         try:
             self.store.load(index_path)
@@ -30,7 +33,7 @@ class RAGAnswerer:
     def _check_ollama(self) -> bool:
         """Check if Ollama is running"""
         try:
-            response = requests.get("http://localhost:11434/api/tags", timeout=2)
+            response = requests.get(f"{self.ollama_url}/api/tags", timeout=2)
             return response.status_code == 200
         except:
             return False
@@ -39,7 +42,7 @@ class RAGAnswerer:
         """Call Ollama with shorter timeout and simpler prompt"""
         try:
             response = requests.post(
-                "http://localhost:11434/api/generate",
+                f"{self.ollama_url}/api/generate",
                 json={
                     "model": "qwen2.5-coder:1.5b",
                     "prompt": prompt,
@@ -66,35 +69,44 @@ class RAGAnswerer:
         Answer a question using RAG
         """
         # Retrieve relevant code
-        results = self.store.search(question, k=k)
+        with tracing.span("answer.retrieve"):
+            results = self.store.search(question, k=k)
         
+        return self.answer_from_results(question, results)
+    
+    def answer_from_results(self, question: str, results: List[Dict]) -> Tuple[str, List[Dict]]:
+        """
+        Answer a question from already retrieved code chunks
+        """
         if not results:
             return "No relevant code found in the index.", []
         
-        # Build simple answer first (fallback)
-        fallback_answer = f"**Found {len(results)} relevant code snippets:**\n\n"
-        for i, r in enumerate(results[:5], 1):
-            fallback_answer += f"{i}. `{r['file']}` - {r['type']} `{r['name']}`\n"
-            if r.get('docstring'):
-                fallback_answer += f"   {r['docstring'][:100]}...\n"
+        with tracing.span("answer.fallback"):
+            # Build simple answer first (fallback)
+            fallback_answer = f"**Found {len(results)} relevant code snippets:**\n\n"
+            for i, r in enumerate(results[:5], 1):
+                fallback_answer += f"{i}. `{r['file']}` - {r['type']} `{r['name']}`\n"
+                if r.get('docstring'):
+                    fallback_answer += f"   {r['docstring'][:100]}...\n"
         
         # If Ollama not available, return simple summary
         if not self.ollama_available:
             fallback_answer += "\n💡 *Start Ollama for AI-generated explanations*"
             return fallback_answer, results
         
-        # Build SHORT context (only top 2 results, truncated)
-        context_parts = []
-        for i, r in enumerate(results[:2], 1):
-            code_snippet = r['code'][:300] + "..." if len(r['code']) > 300 else r['code']
-            context_parts.append(
-                f"[{i}] {r['name']} from {r['file']}\n{code_snippet}"
-            )
+        with tracing.span("answer.prompt"):
+            # Build SHORT context (only top 2 results, truncated)
+            context_parts = []
+            for i, r in enumerate(results[:2], 1):
+                code_snippet = r['code'][:300] + "..." if len(r['code']) > 300 else r['code']
+                context_parts.append(
+                    f"[{i}] {r['name']} from {r['file']}\n{code_snippet}"
+                )
         
-        context = "\n\n".join(context_parts)
+            context = "\n\n".join(context_parts)
         
-        # VERY short, direct prompt
-        prompt = f"""Q: {question}
+            # VERY short, direct prompt
+            prompt = f"""Q: {question}
 
 Code:
 {context}
@@ -102,7 +114,8 @@ Code:
 A (1-2 sentences):"""
         
         # Try to get AI answer
-        ai_answer = self._call_ollama(prompt)
+        with tracing.span("answer.ollama"):
+            ai_answer = self._call_ollama(prompt)
         
         if ai_answer:
             return ai_answer.strip(), results
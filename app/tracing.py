@@ -0,0 +1,221 @@
+"""
+Lightweight stage tracing for queries and index builds.
+
+Code wraps each stage in `tracing.span("stage.name")`. Durations are
+aggregated into per-stage histograms when tracing is enabled (via `enable()`
+or CODEBASE_RAG_TRACING=1), and collected into a per-request breakdown while
+a `tracing.trace()` block is active. With both off, `span()` returns a shared
+no-op context manager.
+"""
+import bisect
+import contextvars
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+METRIC_NAME = "codebase_rag_stage_duration_seconds"
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0
+)
+
+_current_trace = contextvars.ContextVar("codebase_rag_trace", default=None)
+
+class _NullSpan:
+    """No-op span returned when nothing is recording"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def cumulative(self) -> List[int]:
+        """Cumulative counts per bucket, with the +Inf bucket last"""
+        totals, running = [], 0
+        for c in self.counts:
+            running += c
+            totals.append(running)
+        return totals
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (max for the +Inf bucket)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, total in zip(self.buckets, self.cumulative()):
+            if total >= target:
+                return min(bound, self.max)
+        return self.max
+
+class Trace:
+    """Ordered spans recorded for one request or build"""
+
+    def __init__(self):
+        self.spans = []
+        self.depth = 0
+        self.start = time.perf_counter()
+        self.total = 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "total_s": self.total,
+            "spans": [
+                {"name": name, "depth": depth, "seconds": seconds}
+                for name, depth, seconds in self.spans
+            ],
+        }
+
+    def format(self) -> str:
+        """Indented, human-readable breakdown"""
+        lines = []
+        for name, depth, seconds in self.spans:
+            lines.append(f"{'  ' * depth}{name:<{32 - 2 * depth}} {seconds * 1000:10.2f}ms")
+        lines.append(f"{'total':<32} {self.total * 1000:10.2f}ms")
+        return "\n".join(lines)
+
+class _Span:
+    __slots__ = ("tracer", "name", "trace", "index", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, trace: Optional[Trace]):
+        self.tracer = tracer
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        if self.trace is not None:
+            # Reserve the slot now so nested spans appear after their parent
+            self.index = len(self.trace.spans)
+            self.trace.spans.append((self.name, self.trace.depth, 0.0))
+            self.trace.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        if self.trace is not None:
+            self.trace.depth -= 1
+            name, depth, _ = self.trace.spans[self.index]
+            self.trace.spans[self.index] = (name, depth, elapsed)
+        if self.tracer.enabled:
+            self.tracer.observe(self.name, elapsed)
+        return False
+
+class _TraceContext:
+    def __init__(self):
+        self.trace = Trace()
+        self._token = None
+
+    def __enter__(self) -> Trace:
+        self._token = _current_trace.set(self.trace)
+        self.trace.start = time.perf_counter()
+        return self.trace
+
+    def __exit__(self, *exc):
+        self.trace.total = time.perf_counter() - self.trace.start
+        _current_trace.reset(self._token)
+        return False
+
+class Tracer:
+    """Process-wide registry of per-stage duration histograms"""
+
+    def __init__(self, enabled: bool = False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        """Context manager timing one stage"""
+        trace = _current_trace.get()
+        if not self.enabled and trace is None:
+            return NULL_SPAN
+        return _Span(self, name, trace)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms = {}
+
+    def to_json(self) -> Dict:
+        """Per-stage summary with count, sum, max, approximate p50/p99 and cumulative buckets"""
+        with self._lock:
+            out = {}
+            for name, h in sorted(self.histograms.items()):
+                labels = [str(b) for b in h.buckets] + ["+Inf"]
+                out[name] = {
+                    "count": h.count,
+                    "sum_s": h.sum,
+                    "mean_s": h.sum / h.count if h.count else 0.0,
+                    "max_s": h.max,
+                    "p50_s": h.quantile(0.50),
+                    "p99_s": h.quantile(0.99),
+                    "buckets": dict(zip(labels, h.cumulative())),
+                }
+            return out
+
+    def to_prometheus(self) -> str:
+        """Histograms in Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each query and build stage.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                labels = [repr(float(b)) for b in h.buckets] + ["+Inf"]
+                for le, total in zip(labels, h.cumulative()):
+                    lines.append(f'{METRIC_NAME}_bucket{{stage="{name}",le="{le}"}} {total}')
+                lines.append(f'{METRIC_NAME}_sum{{stage="{name}"}} {h.sum}')
+                lines.append(f'{METRIC_NAME}_count{{stage="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+TRACER = Tracer(enabled=os.environ.get("CODEBASE_RAG_TRACING", "").lower() in ("1", "true", "yes"))
+
+def span(name: str):
+    """Time a stage on the global tracer"""
+    return TRACER.span(name)
+
+def trace() -> _TraceContext:
+    """Collect a per-request breakdown of every span entered inside the block"""
+    return _TraceContext()
+
+def enable() -> None:
+    TRACER.enabled = True
+
+def disable() -> None:
+    TRACER.enabled = False
+
+def export_json() -> Dict:
+    return TRACER.to_json()
+
+def export_prometheus() -> str:
+    return TRACER.to_prometheus()
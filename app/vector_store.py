@@ -1,24 +1,116 @@
 import faiss
 import json
+import threading
+import time
 import numpy as np
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from typing import List, Dict, Optional
+from app import tracing
+from app.embedding_service import EmbeddingServiceError, connect_embedding_service
+
+# How long to serve queries locally after the embedding service fails before reconnecting
+SERVICE_RETRY_SECONDS = 30.0
 
 class CodeVectorStore:
     """Vector store for code embeddings using FAISS and sentence-transformers"""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", embedding_socket: Optional[str] = None):
         """
         Initialize the vector store with a sentence transformer model.
         
+        If a shared embedding service for the same model is running, queries are
+        encoded there and the local model is only loaded when building an index.
+        If the service fails, queries fall back to the local model and the store
+        reconnects after SERVICE_RETRY_SECONDS, unless the socket is gone.
+        
         Args:
             model_name: HuggingFace model name for embeddings
+            embedding_socket: Embedding service socket (default: CODEBASE_RAG_EMBED_SOCKET or data/embed.sock);
+                pass "" to always use the local model
         """
-        print(f"Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self._model = None
+        # Guards the lazy model load and the service fallback when threads share one store
+        self._lock = threading.Lock()
         self.index = None
         self.metadata = []
+        
+        self._embedding_socket = embedding_socket
+        # Monotonic time at which to reconnect to a failed service; None means don't
+        self._service_retry_at = None
+        self.embedder = connect_embedding_service(model_name, embedding_socket)
+        if self.embedder is not None:
+            print(f"Using shared embedding service at {self.embedder.socket_path}")
+        else:
+            self._load_model()
+    
+    def _load_model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                
+                print(f"Loading embedding model: {self.model_name}")
+                self._model = SentenceTransformer(self.model_name)
+            return self._model
+    
+    @property
+    def model(self):
+        """Local sentence transformer, loaded on first use"""
+        model = self._model
+        return model if model is not None else self._load_model()
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Encode queries on the shared service when available, else locally"""
+        embedder = self._current_embedder()
+        if embedder is not None:
+            try:
+                return embedder.encode(queries)
+            except (OSError, EmbeddingServiceError) as e:
+                self._service_failed(embedder, e)
+        
+        return np.array(self.model.encode(queries)).astype("float32")
+    
+    def _current_embedder(self):
+        """Service client to use, reconnecting once the retry backoff has passed"""
+        embedder = self.embedder
+        retry_at = self._service_retry_at
+        if embedder is not None or retry_at is None or time.monotonic() < retry_at:
+            return embedder
+        
+        with self._lock:
+            if self.embedder is not None or self._service_retry_at != retry_at:
+                return self.embedder
+            # Claim this attempt; other threads keep using the local model meanwhile
+            self._service_retry_at = time.monotonic() + SERVICE_RETRY_SECONDS
+        
+        embedder = connect_embedding_service(self.model_name, self._embedding_socket)
+        if embedder is None:
+            return None
+        
+        with self._lock:
+            self.embedder = embedder
+            self._service_retry_at = None
+            # Free the fallback model; building an index loads it again
+            self._model = None
+        print(f"Reconnected to shared embedding service at {embedder.socket_path}")
+        return embedder
+    
+    def _service_failed(self, embedder, error: Exception) -> None:
+        """Drop a failed client; reconnect later unless the service is gone"""
+        gone = isinstance(error, (FileNotFoundError, ConnectionRefusedError))
+        
+        with self._lock:
+            # Only the first failing thread tears the client down
+            if self.embedder is not embedder:
+                return
+            self.embedder = None
+            self._service_retry_at = None if gone else time.monotonic() + SERVICE_RETRY_SECONDS
+        
+        embedder.close_all()
+        if gone:
+            print(f"⚠️  Embedding service is gone ({error}), using local model")
+        else:
+            print(f"⚠️  Embedding service failed ({error}), using local model for {SERVICE_RETRY_SECONDS:.0f}s")
     
     def build(self, chunks: List[Dict]) -> None:
         """
@@ -32,6 +124,21 @@ class CodeVectorStore:
         
         print(f"Building embeddings for {len(chunks)} code chunks...")
         
+        with tracing.span("build.encode"):
+            embeddings = self.encode_chunks(chunks)
+        
+        self.build_from_embeddings(chunks, embeddings)
+    
+    def encode_chunks(self, chunks: List[Dict]) -> np.ndarray:
+        """
+        Embed code chunks without touching the index.
+        
+        Args:
+            chunks: List of code chunk dictionaries
+            
+        Returns:
+            float32 array of shape (len(chunks), dim)
+        """
         texts = []
         for c in chunks:
             text = f"{c['name']}\n{c['docstring']}\n{c['code']}"
@@ -42,11 +149,23 @@ class CodeVectorStore:
             show_progress_bar=True,
             batch_size=32
         )
-        embeddings = np.array(embeddings).astype("float32")
+        return np.array(embeddings).astype("float32")
+    
+    def build_from_embeddings(self, chunks: List[Dict], embeddings: np.ndarray) -> None:
+        """
+        Build FAISS index from precomputed chunk embeddings.
         
-        dim = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dim)
-        self.index.add(embeddings)
+        Args:
+            chunks: List of code chunk dictionaries, aligned with embeddings
+            embeddings: float32 array of shape (len(chunks), dim)
+        """
+        if len(chunks) != len(embeddings):
+            raise ValueError(f"Got {len(embeddings)} embeddings for {len(chunks)} chunks")
+        
+        with tracing.span("build.index"):
+            dim = embeddings.shape[1]
+            self.index = faiss.IndexFlatL2(dim)
+            self.index.add(embeddings)
         
         self.metadata = chunks
         print(f"✅ Index built with {self.index.ntotal} vectors (dimension: {dim})")
@@ -64,12 +183,14 @@ class CodeVectorStore:
         path = Path(path)
         path.mkdir(parents=True, exist_ok=True)
         
-        index_path = path / "index.faiss"
-        faiss.write_index(self.index, str(index_path))
+        with tracing.span("save.index"):
+            index_path = path / "index.faiss"
+            faiss.write_index(self.index, str(index_path))
         
-        meta_path = path / "meta.json"
-        with open(meta_path, "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, indent=2)
+        with tracing.span("save.metadata"):
+            meta_path = path / "meta.json"
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(self.metadata, f, indent=2)
         
         print(f"✅ Index saved to {path}")
     
@@ -93,10 +214,12 @@ class CodeVectorStore:
         if not meta_path.exists():
             raise FileNotFoundError(f"Metadata file not found: {meta_path}")
         
-        self.index = faiss.read_index(str(index_path))
+        with tracing.span("load.index"):
+            self.index = faiss.read_index(str(index_path))
         
-        with open(meta_path, "r", encoding="utf-8") as f:
-            self.metadata = json.load(f)
+        with tracing.span("load.metadata"):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                self.metadata = json.load(f)
         
         print(f"✅ Index loaded: {self.index.ntotal} vectors")
     
@@ -111,17 +234,44 @@ class CodeVectorStore:
         Returns:
             List of metadata dictionaries for top-k results
         """
+        return self.search_batch([query], k=k)[0]
+    
+    def search_batch(self, queries: List[str], k: int = 5) -> List[List[Dict]]:
+        """
+        Search for several queries with one encode call and one FAISS search.
+        
+        Args:
+            queries: Search query strings
+            k: Number of results to return per query
+            
+        Returns:
+            One list of top-k metadata dictionaries per query, in input order.
+            Each carries its position in self.metadata as 'id'.
+        """
         if self.index is None:
             raise ValueError("No index loaded. Load or build an index first.")
         
-        query_embedding = self.model.encode([query]).astype("float32")
+        if not queries:
+            return []
+        
+        with tracing.span("search.encode"):
+            query_embeddings = self._encode_queries(queries)
         
-        distances, indices = self.index.search(query_embedding, k)
+        with tracing.span("search.faiss"):
+            distances, indices = self.index.search(query_embeddings, k)
         
-        results = []
-        for idx, dist in zip(indices[0], distances[0]):
-            result = self.metadata[idx].copy()
-            result['distance'] = float(dist)
-            results.append(result)
+        with tracing.span("search.metadata"):
+            all_results = []
+            for row_indices, row_distances in zip(indices, distances):
+                results = []
+                for idx, dist in zip(row_indices, row_distances):
+                    # FAISS pads with -1 when k exceeds the number of vectors
+                    if idx < 0:
+                        continue
+                    result = self.metadata[idx].copy()
+                    result['id'] = int(idx)
+                    result['distance'] = float(dist)
+                    results.append(result)
+                all_results.append(results)
         
-        return results
+        return all_results
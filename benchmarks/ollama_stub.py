@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class OllamaStub:
+    """
+    Minimal local stand-in for the Ollama HTTP API.
+
+    Serves /api/tags and /api/generate with a fixed artificial latency so the
+    answer path can be timed without a running model.
+
+    Usage:
+        with OllamaStub(latency_ms=200) as stub:
+            rag = RAGAnswerer(index_path, ollama_url=stub.url)
+    """
+
+    def __init__(self, latency_ms: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            latency_ms: Delay added to every /api/generate call
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.latency = latency_ms / 1000.0
+        self.calls = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send(200, {"models": [{"name": "stub"}]})
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path != "/api/generate":
+                    self._send(404, {"error": "not found"})
+                    return
+
+                stub.calls += 1
+                time.sleep(stub.latency)
+                prompt = body.get("prompt", "")
+                self._send(200, {
+                    "model": body.get("model", "stub"),
+                    "response": f"Stub answer for a {len(prompt)}-char prompt.",
+                    "done": True,
+                })
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "OllamaStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "OllamaStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,253 @@
+"""
+Benchmark suite for the ingest, build, save/load, search and answer paths.
+
+Run:
+    python -m benchmarks.run_benchmarks run --files 200 --out base.json
+    python -m benchmarks.run_benchmarks compare base.json new.json --threshold 0.10
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.ollama_stub import OllamaStub
+from benchmarks.synthetic_repo import generate_repo
+
+DEFAULT_KS = [1, 5, 10, 20]
+DEFAULT_THRESHOLD = 0.10
+
+def _summarize(samples: List[float]) -> Dict:
+    return {
+        "runs": len(samples),
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.mean(samples),
+        "max_s": max(samples),
+    }
+
+def _time(fn: Callable, repeat: int) -> Dict:
+    """Time `fn` `repeat` times with progress output suppressed"""
+    samples = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    return _summarize(samples)
+
+def _time_each(fn: Callable, inputs: List, repeat: int) -> Dict:
+    """Time `fn(x)` for every input, `repeat` passes; stats are per call"""
+    samples = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for x in inputs:
+                start = time.perf_counter()
+                fn(x)
+                samples.append(time.perf_counter() - start)
+    return _summarize(samples)
+
+def run_benchmarks(
+    files: int = 100,
+    functions_per_file: int = 5,
+    classes_per_file: int = 1,
+    duplicate_ratio: float = 0.0,
+    repeat: int = 3,
+    ks: List[int] = None,
+    queries: int = 20,
+    ollama_latency_ms: float = 50.0,
+    seed: int = 0
+) -> Dict:
+    """
+    Generate a synthetic repository and time every stage of the pipeline.
+
+    Returns:
+        JSON-serialisable report with a "config", "environment" and "results" section
+    """
+    # Heavy imports deferred so `compare` works without the ML stack installed
+    from app.dedup import deduplicate_chunks
+    from app.ingest_code import load_repository
+    from app.rag_answer import RAGAnswerer
+    from app.vector_store import CodeVectorStore
+
+    ks = ks or DEFAULT_KS
+    config = {
+        "files": files,
+        "functions_per_file": functions_per_file,
+        "classes_per_file": classes_per_file,
+        "duplicate_ratio": duplicate_ratio,
+        "repeat": repeat,
+        "ks": ks,
+        "queries": queries,
+        "ollama_latency_ms": ollama_latency_ms,
+        "seed": seed,
+    }
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="rag_bench_") as tmp:
+        tmp = Path(tmp)
+        repo_path = generate_repo(
+            tmp / "synthetic_repo", files, functions_per_file, classes_per_file,
+            duplicate_ratio=duplicate_ratio, seed=seed
+        )
+        index_path = tmp / "index"
+
+        print(f"📂 Synthetic repo: {files} files")
+        results["load_repository"] = _time(lambda: load_repository(repo_path), repeat)
+        with contextlib.redirect_stdout(io.StringIO()):
+            chunks = load_repository(repo_path)
+        print(f"   {len(chunks)} chunks")
+
+        results["dedup"] = _time(lambda: deduplicate_chunks(chunks), repeat)
+        _, dedup_stats = deduplicate_chunks(chunks)
+        print(f"   {dedup_stats['duplicate_rate']:.1%} duplicates")
+
+        # Stay off the shared embedding service so every run times the same local encoder
+        print("🔨 Timing model load and build...")
+        results["model_load"] = _time(lambda: CodeVectorStore(embedding_socket=""), 1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            store = CodeVectorStore(embedding_socket="")
+        results["build"] = _time(lambda: store.build(chunks), repeat)
+
+        print("💾 Timing save/load...")
+        results["save"] = _time(lambda: store.save(str(index_path)), repeat)
+        results["load"] = _time(lambda: store.load(str(index_path)), repeat)
+
+        print("🔍 Timing search...")
+        names = [c["name"] for c in chunks]
+        question_list = [f"How does {names[i * len(names) // queries]} work?" for i in range(queries)]
+        for k in ks:
+            results[f"search_k{k}"] = _time_each(lambda q: store.search(q, k=k), question_list, repeat)
+
+        print(f"🤖 Timing answer (stub latency {ollama_latency_ms:.0f}ms)...")
+        with OllamaStub(latency_ms=ollama_latency_ms) as stub:
+            with contextlib.redirect_stdout(io.StringIO()):
+                rag = RAGAnswerer(str(index_path), ollama_url=stub.url, embedding_socket="")
+            results["answer"] = _time_each(lambda q: rag.answer(q, k=5), question_list, 1)
+
+    return {
+        "config": config,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "encoder": f"local:{store.model_name}",
+        },
+        "chunks": len(chunks),
+        "dedup": dedup_stats,
+        "results": results,
+    }
+
+def compare_reports(base: Dict, new: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare median timings of two reports.
+
+    Args:
+        base: Baseline report
+        new: Candidate report
+        threshold: Relative slowdown (0.10 = 10%) that counts as a regression
+
+    Returns:
+        One row per benchmark present in both reports
+    """
+    rows = []
+    for name, base_stats in base["results"].items():
+        new_stats = new["results"].get(name)
+        if new_stats is None:
+            continue
+
+        base_median = base_stats["median_s"]
+        new_median = new_stats["median_s"]
+        change = (new_median - base_median) / base_median if base_median else 0.0
+
+        rows.append({
+            "name": name,
+            "base_s": base_median,
+            "new_s": new_median,
+            "change": change,
+            "regression": change > threshold,
+        })
+    return rows
+
+def _print_report(report: Dict) -> None:
+    print(f"\n📊 Results ({report['chunks']} chunks)")
+    for name, stats in report["results"].items():
+        print(f"  {name:<18} median {stats['median_s'] * 1000:10.2f}ms   min {stats['min_s'] * 1000:10.2f}ms")
+
+def _print_comparison(rows: List[Dict], threshold: float) -> None:
+    print(f"\n📊 Comparison (regression threshold {threshold:.0%})")
+    for row in rows:
+        flag = "❌ REGRESSION" if row["regression"] else "✅"
+        print(
+            f"  {row['name']:<18} {row['base_s'] * 1000:10.2f}ms -> {row['new_s'] * 1000:10.2f}ms "
+            f"({row['change']:+.1%})  {flag}"
+        )
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Codebase RAG benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run benchmarks on a synthetic repository")
+    run.add_argument("--files", type=int, default=100)
+    run.add_argument("--functions-per-file", type=int, default=5)
+    run.add_argument("--classes-per-file", type=int, default=1)
+    run.add_argument("--duplicate-ratio", type=float, default=0.0, help="Fraction of modules copied into a vendored package")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--k", type=int, nargs="+", default=DEFAULT_KS, help="k values for search")
+    run.add_argument("--queries", type=int, default=20)
+    run.add_argument("--ollama-latency-ms", type=float, default=50.0)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--out", help="Write the JSON report to this file")
+
+    cmp = sub.add_parser("compare", help="Flag regressions between two reports")
+    cmp.add_argument("base")
+    cmp.add_argument("new")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run_benchmarks(
+            files=args.files,
+            functions_per_file=args.functions_per_file,
+            classes_per_file=args.classes_per_file,
+            duplicate_ratio=args.duplicate_ratio,
+            repeat=args.repeat,
+            ks=args.k,
+            queries=args.queries,
+            ollama_latency_ms=args.ollama_latency_ms,
+            seed=args.seed,
+        )
+        _print_report(report)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"\n✅ Report saved to {args.out}")
+        else:
+            print(json.dumps(report, indent=2))
+        return 0
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    if base.get("config") != new.get("config"):
+        print("⚠️  Reports were produced with different configs; comparison may be meaningless")
+    if base.get("environment", {}).get("encoder") != new.get("environment", {}).get("encoder"):
+        print("⚠️  Reports were produced with different encoders; model_load and search timings are not comparable")
+
+    rows = compare_reports(base, new, args.threshold)
+    _print_comparison(rows, args.threshold)
+    return 1 if any(row["regression"] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import random
+from pathlib import Path
+
+WORDS = [
+    "user", "order", "cache", "token", "session", "config", "record", "buffer",
+    "request", "response", "payload", "index", "query", "result", "handler",
+    "client", "server", "stream", "event", "metric", "account", "invoice",
+]
+
+def _ident(rng: random.Random, parts: int = 2) -> str:
+    return "_".join(rng.choice(WORDS) for _ in range(parts))
+
+def _function_source(rng: random.Random, name: str, indent: str = "") -> str:
+    args = [_ident(rng, 1) + str(i) for i in range(rng.randint(1, 4))]
+    body_lines = rng.randint(3, 12)
+
+    lines = [
+        f"{indent}def {name}({', '.join(args)}):",
+        f'{indent}    """Process {" ".join(name.split("_"))} for the given {args[0]}."""',
+        f"{indent}    total = 0",
+    ]
+    for i in range(body_lines):
+        arg = rng.choice(args)
+        lines.append(f"{indent}    if {arg} is not None and {i} % 2 == 0:")
+        lines.append(f"{indent}        total += len(str({arg})) * {rng.randint(1, 9)}")
+    lines.append(f"{indent}    return total")
+    return "\n".join(lines)
+
+def _class_source(rng: random.Random, name: str) -> str:
+    lines = [
+        f"class {name}:",
+        f'    """Manage {name.lower()} state."""',
+        "",
+        "    def __init__(self, value=None):",
+        "        self.value = value",
+    ]
+    for _ in range(rng.randint(1, 4)):
+        lines.append("")
+        lines.append(_function_source(rng, _ident(rng), indent="    ").replace("(", "(self, ", 1))
+    return "\n".join(lines)
+
+def generate_repo(
+    root: Path,
+    num_files: int = 100,
+    functions_per_file: int = 5,
+    classes_per_file: int = 1,
+    packages: int = 5,
+    duplicate_ratio: float = 0.0,
+    seed: int = 0
+) -> Path:
+    """
+    Write a deterministic synthetic Python repository.
+
+    The same arguments always produce byte-identical files, so timings from
+    separate runs are comparable.
+
+    Args:
+        root: Directory to create the repository in
+        num_files: Number of .py modules to write
+        functions_per_file: Top-level functions per module
+        classes_per_file: Classes per module (each with a few methods)
+        packages: Number of packages the modules are spread across
+        duplicate_ratio: Fraction of modules also copied into a "vendored" package,
+            alternating verbatim copies and copies with one changed token
+        seed: Random seed
+
+    Returns:
+        Path to the repository root
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    for p in range(packages):
+        pkg = root / f"pkg{p}"
+        pkg.mkdir(exist_ok=True)
+        (pkg / "__init__.py").write_text("", encoding="utf-8")
+
+    sources = []
+    for f in range(num_files):
+        parts = [f'"""Synthetic module {f}."""', "import os", ""]
+        for i in range(functions_per_file):
+            parts.append(_function_source(rng, f"{_ident(rng)}_{f}_{i}"))
+            parts.append("")
+        for i in range(classes_per_file):
+            parts.append(_class_source(rng, f"{_ident(rng, 1).title()}Manager{f}x{i}"))
+            parts.append("")
+
+        source = "\n\n".join(parts) + "\n"
+        module = root / f"pkg{f % packages}" / f"module_{f}.py"
+        module.write_text(source, encoding="utf-8")
+        sources.append(source)
+
+    copies = int(num_files * duplicate_ratio)
+    if copies:
+        vendored = root / "vendored"
+        vendored.mkdir(exist_ok=True)
+        (vendored / "__init__.py").write_text("", encoding="utf-8")
+
+        for i, f in enumerate(rng.sample(range(num_files), copies)):
+            source = sources[f] if i % 2 == 0 else sources[f].replace("total = 0", "total = 1")
+            (vendored / f"copy_{f}.py").write_text(source, encoding="utf-8")
+
+    return root
@@ -0,0 +1,113 @@
+"""
+Tests for the micro-batcher that coalesces concurrent requests
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.batching import MicroBatcher, percentile
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_requests_within_window_share_one_batch():
+    batches = []
+
+    def handler(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(handler, max_batch_size=32, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results, batcher
+
+    results, batcher = run(main())
+
+    assert results == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert (batcher.batches_run, batcher.items_run) == (1, 5)
+
+def test_batches_are_capped_at_max_batch_size():
+    sizes = []
+
+    def handler(items):
+        sizes.append(len(items))
+        return items
+
+    async def main():
+        batcher = MicroBatcher(handler, max_batch_size=2, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    assert run(main()) == [0, 1, 2, 3, 4]
+    assert sizes == [2, 2, 1]
+
+def test_result_count_mismatch_fails_the_batch():
+    async def main():
+        batcher = MicroBatcher(lambda items: items[:-1], max_wait_ms=20)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = run(main())
+
+    assert all(isinstance(r, RuntimeError) and "2 items" in str(r) for r in results)
+
+def test_handler_error_fails_batch_but_batcher_keeps_running():
+    def handler(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return items
+
+    async def main():
+        batcher = MicroBatcher(handler, max_wait_ms=1)
+        with pytest.raises(ValueError):
+            await batcher.submit("bad")
+        result = await batcher.submit("good")
+        await batcher.stop()
+        return result
+
+    assert run(main()) == "good"
+
+def test_stop_fails_in_flight_and_queued_requests():
+    started = threading.Event()
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def handler(items):
+        started.set()
+        release.wait(5)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(handler, max_batch_size=1, max_wait_ms=0, executor=executor)
+        tasks = [asyncio.create_task(batcher.submit(i)) for i in range(3)]
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+
+        await batcher.stop()
+        # A timeout rather than a hang if stop() leaves requests unanswered
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 5)
+
+    try:
+        results = run(main())
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+
+    assert len(results) == 3
+    assert all(isinstance(r, RuntimeError) and "stopped" in str(r) for r in results)
+
+def test_invalid_batch_size_is_rejected():
+    with pytest.raises(ValueError):
+        MicroBatcher(lambda items: items, max_batch_size=0)
+
+def test_percentile():
+    assert percentile([], 99) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile([float(i) for i in range(1, 101)], 99) == 99.0
+    assert percentile([5.0], 0) == 5.0
@@ -0,0 +1,114 @@
+"""
+Tests for checkpointed index builds
+"""
+import hashlib
+import json
+
+import faiss
+import numpy as np
+import pytest
+
+from app import build_index, checkpoint
+from app.checkpoint import CHECKPOINT_DIR, local_manifest
+from app.index_stats import load_index_stats
+from app.vector_store import CodeVectorStore
+from benchmarks.synthetic_repo import generate_repo
+
+SHARD_SIZE = 7
+
+class CrashAfter(Exception):
+    pass
+
+class FakeModel:
+    """Deterministic stand-in for the sentence transformer; can crash after a number of shards"""
+
+    def __init__(self, crash_after=None):
+        self.calls = 0
+        self.crash_after = crash_after
+
+    def encode(self, texts, **kwargs):
+        if self.crash_after is not None and self.calls >= self.crash_after:
+            raise CrashAfter()
+        self.calls += 1
+        return np.array([
+            np.frombuffer(hashlib.sha256(text.encode("utf-8")).digest(), dtype=np.uint8)[:16] / 255.0
+            for text in texts
+        ], dtype="float32")
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_EVERY", SHARD_SIZE)
+    return generate_repo(tmp_path / "repo", num_files=6, duplicate_ratio=0.3)
+
+def use_model(monkeypatch, model):
+    def load_model(self):
+        self._model = model
+        return model
+    monkeypatch.setattr(CodeVectorStore, "_load_model", load_model)
+
+def read_index(index_path):
+    index = faiss.read_index(str(index_path / "index.faiss"))
+    vectors = index.reconstruct_n(0, index.ntotal)
+    with open(index_path / "meta.json", encoding="utf-8") as f:
+        return vectors, json.load(f)
+
+def test_resumed_build_matches_uninterrupted_build(tmp_path, repo, monkeypatch):
+    use_model(monkeypatch, FakeModel())
+    build_index.build_index_from_local(str(repo), str(tmp_path / "full"))
+
+    crashing = FakeModel(crash_after=2)
+    use_model(monkeypatch, crashing)
+    with pytest.raises(CrashAfter):
+        build_index.build_index_from_local(str(repo), str(tmp_path / "resumed"))
+
+    state_path = tmp_path / "resumed" / CHECKPOINT_DIR / "state.json"
+    state = json.loads(state_path.read_text(encoding="utf-8"))
+    assert state["embedded"] == 2 * SHARD_SIZE < state["num_chunks"]
+    # Pretend the interrupted run was slow so its time clearly shows up in the stats
+    state["elapsed_seconds"] = 100.0
+    state_path.write_text(json.dumps(state), encoding="utf-8")
+
+    resumed_model = FakeModel()
+    use_model(monkeypatch, resumed_model)
+    build_index.build_index_from_local(str(repo), str(tmp_path / "resumed"), resume=True)
+
+    full_vectors, full_meta = read_index(tmp_path / "full")
+    resumed_vectors, resumed_meta = read_index(tmp_path / "resumed")
+    assert np.array_equal(full_vectors, resumed_vectors)
+    assert full_meta == resumed_meta
+
+    # Only the shards missing from the checkpoint were embedded again
+    expected_shards = -(-state["num_chunks"] // SHARD_SIZE)
+    assert resumed_model.calls == expected_shards - 2
+    assert not (tmp_path / "resumed" / CHECKPOINT_DIR).exists()
+
+    stats = load_index_stats(str(tmp_path / "resumed"))
+    assert stats["build_seconds"] >= 100.0
+
+def test_changed_source_is_not_resumed(tmp_path, repo, monkeypatch):
+    use_model(monkeypatch, FakeModel(crash_after=1))
+    with pytest.raises(CrashAfter):
+        build_index.build_index_from_local(str(repo), str(tmp_path / "index"))
+
+    next(repo.rglob("*.py")).write_text("def changed():\n    return 1\n", encoding="utf-8")
+
+    model = FakeModel()
+    use_model(monkeypatch, model)
+    build_index.build_index_from_local(str(repo), str(tmp_path / "index"), resume=True)
+
+    _, meta = read_index(tmp_path / "index")
+    assert model.calls == -(-len(meta) // SHARD_SIZE)
+
+def test_manifest_ignores_skipped_files_quietly(tmp_path, capsys):
+    (tmp_path / "app.py").write_text("x = 1\n", encoding="utf-8")
+    before = local_manifest(tmp_path)
+
+    (tmp_path / ".venv").mkdir()
+    (tmp_path / ".venv" / "site.py").write_text("y = 2\n", encoding="utf-8")
+    (tmp_path / "big.py").write_text("#" * 600 * 1024, encoding="utf-8")
+
+    assert local_manifest(tmp_path) == before
+    assert "Skipping" not in capsys.readouterr().out
+
+    (tmp_path / "app.py").write_text("x = 2\n", encoding="utf-8")
+    assert local_manifest(tmp_path) != before
@@ -0,0 +1,124 @@
+"""
+Tests for exact and near-duplicate chunk detection
+"""
+import contextlib
+import io
+import textwrap
+
+from app.dedup import deduplicate_chunks, tokenize_source
+from app.ingest_code import load_repository
+
+# Long enough (> MIN_NEAR_DUP_TOKENS) to take part in near-duplicate matching
+HELPER = textwrap.dedent('''
+    def merge_settings(base, override):
+        """Merge two settings dictionaries."""
+        result = dict(base)
+        for key, value in override.items():
+            if isinstance(value, dict) and isinstance(result.get(key), dict):
+                result[key] = merge_settings(result[key], value)
+            elif value is not None:
+                result[key] = value
+            else:
+                result.pop(key, None)
+        return result
+''').strip()
+
+OTHER = textwrap.dedent('''
+    def parse_header(line):
+        """Split an HTTP header line into name and value."""
+        name, _, value = line.partition(":")
+        if not name or name != name.strip():
+            raise ValueError(f"Malformed header: {line!r}")
+        return name.lower(), value.strip()
+''').strip()
+
+def make_chunk(code, file="pkg/a.py", name="merge_settings", type="Function"):
+    return {"type": type, "name": name, "docstring": "", "code": code, "file": file}
+
+def test_tokenize_drops_comments_but_keeps_hash_in_strings():
+    tokens = tokenize_source('x = "# not a comment"  # a comment\ny = 1')
+    assert tokens == ["x", "=", '"# not a comment"', "y", "=", "1"]
+
+def test_exact_duplicates_collapse_with_aliases():
+    chunks = [make_chunk(HELPER), make_chunk(HELPER, file="vendor/a.py")]
+
+    unique, stats = deduplicate_chunks(chunks)
+
+    assert len(unique) == 1
+    assert unique[0]["file"] == "pkg/a.py"
+    assert unique[0]["aliases"] == [{"file": "vendor/a.py", "name": "merge_settings", "type": "Function"}]
+    assert stats["exact_duplicates"] == 1
+    assert stats["near_duplicates"] == 0
+    assert stats["duplicate_rate"] == 0.5
+
+def test_comments_and_whitespace_are_ignored():
+    reformatted = HELPER.replace("result = dict(base)", "result  =  dict( base )  # copy first")
+    reformatted = reformatted.replace("\n", "\n\n")
+
+    unique, stats = deduplicate_chunks([make_chunk(HELPER), make_chunk(reformatted, file="b.py")])
+
+    assert len(unique) == 1
+    assert stats["exact_duplicates"] == 1
+
+def test_input_chunks_are_not_mutated():
+    chunks = [make_chunk(HELPER), make_chunk(HELPER, file="vendor/a.py")]
+
+    deduplicate_chunks(chunks)
+
+    assert "aliases" not in chunks[0]
+
+def test_near_duplicate_above_threshold_is_aliased():
+    tweaked = HELPER.replace("result.pop(key, None)", "result.pop(key)")
+
+    unique, stats = deduplicate_chunks([make_chunk(HELPER), make_chunk(tweaked, file="vendor/a.py")])
+
+    assert len(unique) == 1
+    assert stats["near_duplicates"] == 1
+    assert unique[0]["aliases"][0]["file"] == "vendor/a.py"
+
+def test_near_duplicate_below_threshold_is_kept():
+    tweaked = HELPER.replace("result.pop(key, None)", "result.pop(key)")
+
+    unique, stats = deduplicate_chunks(
+        [make_chunk(HELPER), make_chunk(tweaked, file="vendor/a.py")], near_threshold=0.99
+    )
+
+    assert len(unique) == 2
+    assert stats["near_duplicates"] == 0
+
+def test_unrelated_chunks_are_kept():
+    unique, stats = deduplicate_chunks([make_chunk(HELPER), make_chunk(OTHER, name="parse_header")])
+
+    assert len(unique) == 2
+    assert stats["duplicate_rate"] == 0.0
+
+def test_chunks_of_different_types_are_not_merged():
+    chunks = [make_chunk(HELPER), make_chunk(HELPER, file="b.py", type="AsyncFunction")]
+
+    unique, _ = deduplicate_chunks(chunks)
+
+    assert len(unique) == 2
+
+def test_nested_function_is_not_aliased_to_its_parent():
+    outer = "def outer():\n    " + HELPER.replace("\n", "\n    ") + "\n    return merge_settings"
+    chunks = [make_chunk(outer, name="outer"), make_chunk(HELPER)]
+
+    unique, stats = deduplicate_chunks(chunks)
+
+    assert len(unique) == 2
+    assert stats["near_duplicates"] == 0
+
+def test_class_with_single_method_keeps_both_chunks(tmp_path):
+    method = HELPER.replace("(base, override)", "(self, base, override)").replace("\n", "\n    ")
+    source = f"class SettingsMerger:\n    {method}\n"
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "merger.py").write_text(source, encoding="utf-8")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks = load_repository(tmp_path)
+    unique, stats = deduplicate_chunks(chunks)
+
+    assert sorted(c["type"] for c in chunks) == ["Class", "Function"]
+    assert len(unique) == 2
+    assert stats["near_duplicates"] == 0
+    assert all("aliases" not in c for c in unique)
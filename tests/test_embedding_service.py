@@ -0,0 +1,81 @@
+"""
+Tests for the embedding service client's connection handling
+"""
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from app.embedding_service import (
+    EmbeddingClient,
+    EmbeddingService,
+    EmbeddingServiceError,
+    connect_embedding_service,
+)
+
+@pytest.fixture
+def listener(tmp_path):
+    """A Unix socket that accepts connections (via the backlog) but never answers"""
+    path = tmp_path / "embed.sock"
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen(64)
+    yield path
+    server.close()
+
+def connect_from_threads(client, count):
+    socks = []
+    threads = [threading.Thread(target=lambda: socks.append(client._connect())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return socks
+
+def test_empty_socket_path_disables_service(listener):
+    assert connect_embedding_service(socket_path="") is None
+    assert connect_embedding_service(socket_path=False) is None
+
+def test_exited_threads_sockets_are_closed_on_next_connect(listener):
+    client = EmbeddingClient(str(listener))
+    old = connect_from_threads(client, 20)
+
+    connect_from_threads(client, 1)
+
+    assert all(sock.fileno() == -1 for sock in old)
+    assert len(client._socks) == 1
+    client.close_all()
+
+def test_close_all_reaches_other_threads(listener):
+    client = EmbeddingClient(str(listener))
+    connected = threading.Barrier(4)
+    release = threading.Event()
+    socks = []
+
+    def hold_connection():
+        socks.append(client._connect())
+        connected.wait()
+        release.wait()
+
+    threads = [threading.Thread(target=hold_connection) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    connected.wait()
+
+    client.close_all()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(sock.fileno() == -1 for sock in socks)
+    assert client._socks == {}
+
+def test_serve_refuses_live_socket(listener):
+    service = EmbeddingService.__new__(EmbeddingService)
+    service.socket_path = listener
+
+    with pytest.raises(EmbeddingServiceError):
+        asyncio.run(service.serve())
+
+    assert listener.exists()
@@ -0,0 +1,27 @@
+"""
+Tests for the index stats manifest
+"""
+from app.index_stats import STATS_FILE, compute_index_stats, load_index_stats, write_index_stats
+
+def test_files_include_aliased_locations():
+    chunks = [
+        {"type": "Function", "file": "pkg/a.py", "aliases": [{"file": "vendor/a.py", "name": "f", "type": "Function"}]},
+        {"type": "Class", "file": "pkg/b.py"},
+    ]
+
+    stats = compute_index_stats(chunks, {"path": "/repo", "manifest": "abc"}, 1.0)
+
+    assert stats["chunks"] == 2
+    assert stats["files"] == 3
+    assert stats["types"] == {"Function": 1, "Class": 1}
+
+def test_write_is_atomic_and_round_trips(tmp_path):
+    stats = compute_index_stats([{"type": "Function", "file": "a.py"}], {"repo": "r", "commit": "c"}, 2.0)
+
+    write_index_stats(str(tmp_path), stats)
+
+    assert [p.name for p in tmp_path.iterdir()] == [STATS_FILE]
+    assert load_index_stats(str(tmp_path)) == stats
+
+def test_missing_stats_load_as_none(tmp_path):
+    assert load_index_stats(str(tmp_path)) is None
@@ -0,0 +1,49 @@
+"""
+Tests for batched retrieval in the query server
+"""
+import asyncio
+
+from app.query_server import QueryServer
+
+class FakeStore:
+    """Returns k numbered results per query and records every call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def search_batch(self, queries, k=5):
+        self.calls.append((list(queries), k))
+        return [[{"query": q, "rank": i} for i in range(k)] for q in queries]
+
+class FakeRAG:
+    def __init__(self):
+        self.store = FakeStore()
+
+def test_search_batch_uses_largest_k_and_trims_per_request():
+    rag = FakeRAG()
+    server = QueryServer(rag)
+    try:
+        results = server._search_batch([("a", 2), ("b", 5), ("c", 1)])
+    finally:
+        server.close()
+
+    assert rag.store.calls == [(["a", "b", "c"], 5)]
+    assert [len(r) for r in results] == [2, 5, 1]
+    assert [r[0]["query"] for r in results] == ["a", "b", "c"]
+
+def test_concurrent_searches_are_coalesced():
+    rag = FakeRAG()
+    server = QueryServer(rag, max_wait_ms=50)
+
+    async def main():
+        results = await asyncio.gather(server.search("a", 3), server.search("b", 1))
+        await server.batcher.stop()
+        return results
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        server.close()
+
+    assert len(rag.store.calls) == 1
+    assert [len(r) for r in results] == [3, 1]
@@ -5,7 +5,11 @@ from pathlib import Path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import streamlit as st
-from app.rag_answer import RAGAnswerer
+from app import tracing
+from app.index_stats import STATS_FILE, load_index_stats
+from app.rag_answer import RAGAnswerer, INDEX_PATH
+
+SNIPPETS_PER_PAGE = 3
 
 st.set_page_config(
     page_title="Codebase RAG Assistant",
@@ -30,6 +34,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_data
+def read_index_stats(index_path: str, mtime: float):
+    """Read the small stats manifest; mtime in the cache key picks up rebuilds. None if unavailable"""
+    try:
+        return load_index_stats(index_path)
+    except (OSError, ValueError):
+        return None
+
 st.markdown('<p class="main-header">🤖 Codebase RAG Assistant</p>', unsafe_allow_html=True)
 st.caption("Ask questions about your codebase using AI-powered semantic search")
 
@@ -57,13 +69,23 @@ with st.sidebar:
     st.divider()
     
     st.header("📊 Stats")
-    if Path("data/code_index/meta.json").exists():
-        import json
-        with open("data/code_index/meta.json") as f:
-            metadata = json.load(f)
-        st.metric("Indexed Code Chunks", len(metadata))
-        st.metric("Functions", sum(1 for m in metadata if "Function" in m["type"]))
-        st.metric("Classes", sum(1 for m in metadata if "Class" in m["type"]))
+    try:
+        stats = read_index_stats(INDEX_PATH, (Path(INDEX_PATH) / STATS_FILE).stat().st_mtime)
+    except OSError:
+        stats = None
+    
+    if stats is not None:
+        types = stats["types"]
+        st.metric("Indexed Code Chunks", stats["chunks"])
+        st.metric("Functions", sum(n for t, n in types.items() if "Function" in t))
+        st.metric("Classes", sum(n for t, n in types.items() if "Class" in t))
+        st.metric("Files", stats["files"])
+        if stats.get("repo"):
+            commit = f" @ `{stats['commit'][:8]}`" if stats.get("commit") else ""
+            st.caption(f"📦 `{stats['repo']}`{commit}")
+        st.caption(f"🕒 Built {stats['built_at']} in {stats['build_seconds']:.0f}s")
+    elif (Path(INDEX_PATH) / "meta.json").exists():
+        st.info("Index stats unavailable. Rebuild the index to generate them.")
     else:
         st.warning("No index found. Run `python -m app.build_index` first.")
 
@@ -118,13 +140,15 @@ if ask_button:
     else:
         with st.spinner("🔍 Searching codebase..."):
             try:
-                answer, contexts = rag.answer(question, k=k_results)
+                with tracing.trace() as query_trace:
+                    answer, contexts = rag.answer(question, k=k_results)
                 
-                # Add to history
+                # Add to history; code is looked up from the index when displayed
                 st.session_state.chat_history.append({
                     "question": question,
                     "answer": answer,
-                    "contexts": contexts
+                    "hits": [{"id": c["id"], "distance": c["distance"]} for c in contexts],
+                    "timings": query_trace.as_dict()
                 })
                 
                 st.rerun()
@@ -146,8 +170,25 @@ if st.session_state.chat_history:
             st.markdown("### 🤖 Answer")
             st.success(chat["answer"])
             
-            with st.expander(f"📂 View {len(chat['contexts'])} Retrieved Code Snippets"):
-                for j, ctx in enumerate(chat["contexts"], 1):
+            if chat.get("timings"):
+                timings = chat["timings"]
+                with st.expander(f"⏱️ Timing breakdown ({timings['total_s'] * 1000:.0f}ms total)"):
+                    for span in timings["spans"]:
+                        indent = "&nbsp;" * 4 * span["depth"]
+                        st.markdown(f"{indent}`{span['name']}` — {span['seconds'] * 1000:.1f}ms", unsafe_allow_html=True)
+            
+            hits = chat["hits"]
+            if hits and st.toggle(f"📂 View {len(hits)} Retrieved Code Snippets", key=f"snippets_{idx}"):
+                pages = (len(hits) + SNIPPETS_PER_PAGE - 1) // SNIPPETS_PER_PAGE
+                page = 1
+                if pages > 1:
+                    page = st.number_input(
+                        f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"snippets_page_{idx}"
+                    )
+                
+                first = (page - 1) * SNIPPETS_PER_PAGE
+                for j, hit in enumerate(hits[first:first + SNIPPETS_PER_PAGE], first + 1):
+                    ctx = rag.store.metadata[hit["id"]]
                     st.markdown(f"**Snippet {j}**")
                     
                     col_a, col_b, col_c = st.columns(3)
@@ -155,12 +196,17 @@ if st.session_state.chat_history:
                     col_b.markdown(f"🏷️ **Type:** `{ctx['type']}`")
                     col_c.markdown(f"✨ **Name:** `{ctx['name']}`")
                     
-                    if show_distances and 'distance' in ctx:
-                        st.caption(f"Similarity score: {ctx['distance']:.4f}")
+                    if show_distances:
+                        st.caption(f"Similarity score: {hit['distance']:.4f}")
                     
                     if ctx.get('docstring'):
                         st.markdown(f"**Description:** {ctx['docstring'][:200]}...")
                     
+                    if ctx.get('aliases'):
+                        locations = ", ".join(f"`{a['file']}`" for a in ctx['aliases'][:5])
+                        more = f" and {len(ctx['aliases']) - 5} more" if len(ctx['aliases']) > 5 else ""
+                        st.caption(f"🔁 Also found at {locations}{more}")
+                    
                     st.code(ctx["code"], language="python")
                     st.divider()
             